@@ -0,0 +1,32 @@
+# cython: language_level=3
+"""Compiled builders for the OpenAI payloads assembled by mcp_client.py.
+
+Build in place with ``cythonize -i _builders.pyx``. mcp_client.py falls back to
+equivalent pure-Python builders when the extension has not been compiled.
+"""
+
+
+cpdef list build_available_tools(list tools):
+    """Convert MCP tools into OpenAI function tool definitions"""
+    cdef list available_tools = []
+    cdef object tool
+    for tool in tools:
+        available_tools.append({
+            "type": "function",
+            "function": {
+                "name": tool.name,
+                "description": tool.description or "",
+                "parameters": tool.inputSchema,
+            },
+        })
+    return available_tools
+
+
+cpdef dict build_tool_call_msg(str content, list tool_calls):
+    """Build the assistant message that carries a turn's tool calls"""
+    return {"role": "assistant", "content": content, "tool_calls": tool_calls}
+
+
+cpdef dict build_tool_result_msg(str tool_call_id, str content):
+    """Build the tool message that answers one tool call"""
+    return {"role": "tool", "tool_call_id": tool_call_id, "content": content}
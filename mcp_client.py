@@ -1,23 +1,78 @@
 import asyncio
 import os
 import json
+import sys
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
+from datetime import timedelta
 from typing import cast
 from enum import Enum
+from functools import lru_cache
 
+import aiohttp
+import anyio
 import openai
+import orjson
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, send_from_directory
+from httpx_aiohttp import AiohttpTransport
+from quart import Quart, request, send_from_directory
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+try:
+    # Optional compiled payload builders, see _builders.pyx
+    from _builders import build_available_tools, build_tool_call_msg, build_tool_result_msg
+except ImportError:
+    def build_available_tools(tools: list) -> list[dict]:
+        """Convert MCP tools into OpenAI function tool definitions"""
+        return [
+            {
+                "type": "function",
+                "function": {
+                    "name": tool.name,
+                    "description": tool.description or "",
+                    "parameters": tool.inputSchema,
+                }
+            }
+            for tool in tools
+        ]
+
+    def build_tool_call_msg(content: str, tool_calls: list[dict]) -> dict:
+        """Build the assistant message that carries a turn's tool calls"""
+        return {"role": "assistant", "content": content, "tool_calls": tool_calls}
+
+    def build_tool_result_msg(tool_call_id: str, content: str) -> dict:
+        """Build the tool message that answers one tool call"""
+        return {"role": "tool", "tool_call_id": tool_call_id, "content": content}
 
 load_dotenv()
 
-app = Flask(__name__, static_folder='static', template_folder='static')
+app = Quart(__name__, static_folder='static', template_folder='static')
+
 
-openai_client = openai.AsyncOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+# Size of the shared aiohttp connection pool used for outbound HTTP (OpenAI API)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 100))
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    # Keep connections and DNS results around so requests skip TCP/TLS setup
+    connector = aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, ttl_dns_cache=300, keepalive_timeout=75)
+    return aiohttp.ClientSession(connector=connector)
+
+
+def create_openai_client(session: aiohttp.ClientSession) -> openai.AsyncOpenAI:
+    # Use the aiohttp transport on the shared session so concurrent requests
+    # reuse pooled keep-alive connections to the OpenAI API
+    return openai.AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=openai.DefaultAioHttpClient(transport=AiohttpTransport(client=session)),
+    )
+
+# Created in startup() so the connection pool is bound to the serving event loop
+http_session: aiohttp.ClientSession | None = None
+openai_client: openai.AsyncOpenAI | None = None
 
 class DatabaseType(Enum):
     ORACLE = "oracle"
@@ -31,20 +86,173 @@ try:
 except ValueError:
     raise ValueError(f"Invalid DB_TYPE: {db_type_str}. Must be one of: {[e.value for e in DatabaseType]}")
 
-db_type_string_value = db_type.value
-# Create server parameters for stdio connection
-server_params = StdioServerParameters(
-    command="python",  # Executable
-    args=[f"./servers/mcp_server_{db_type_string_value}.py"],  # link to where the mcp server is with tools for agent
-    env=None,  # Optional environment variables
-)
+def get_server_params(db: DatabaseType) -> StdioServerParameters:
+    # Create server parameters for stdio connection
+    return StdioServerParameters(
+        command="python",  # Executable
+        args=[f"./servers/mcp_server_{db.value}.py"],  # link to where the mcp server is with tools for agent
+        env=None,  # Optional environment variables
+    )
 
-@dataclass
-class ChatSession:
-    messages: list[dict] = field(default_factory=list)
-    session_id: str = ""
+# Long-lived MCP sessions keyed by database type, so each request reuses the
+# same server subprocess instead of spawning and initializing a new one
+sessions_by_db: dict[DatabaseType, ClientSession] = {}
+_session_tasks: dict[DatabaseType, asyncio.Task] = {}
+_session_stops: dict[DatabaseType, asyncio.Event] = {}
+_session_lock = asyncio.Lock()
+
+# Seconds to wait for an MCP server's response before failing the request, so a
+# hung server can't stall a chat session indefinitely
+MCP_READ_TIMEOUT = float(os.getenv("MCP_READ_TIMEOUT", 120))
 
-    system_prompt: str = """You are a master database assistant with access to database tools.
+
+async def _hold_mcp_session(db: DatabaseType, ready: asyncio.Future, stop: asyncio.Event):
+    """Keep an MCP session open until asked to stop.
+
+    The stdio transport and session are context managers that must be entered and
+    exited from the same task, so this task owns them for the session's lifetime.
+    """
+    session = None
+    try:
+        async with stdio_client(get_server_params(db)) as (read, write):
+            async with ClientSession(read, write, read_timeout_seconds=timedelta(seconds=MCP_READ_TIMEOUT)) as session:
+                await session.initialize()
+                sessions_by_db[db] = session
+                ready.set_result(session)
+                await stop.wait()
+    except Exception as e:
+        if not ready.done():
+            ready.set_exception(e)
+        print(f"MCP session for {db.value} closed: {str(e)}")
+    finally:
+        # A replacement session may already be registered after an eviction
+        if session is not None and sessions_by_db.get(db) is session:
+            del sessions_by_db[db]
+        if _session_stops.get(db) is stop:
+            del _session_stops[db]
+            _session_tasks.pop(db, None)
+        if session is not None:
+            _tools_cache.pop(id(session), None)
+
+
+def evict_mcp_session_on_disconnect(session: ClientSession, error: BaseException):
+    """Forget a session whose server has gone away, so the next request respawns it"""
+    closed = (
+        isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream))
+        or (isinstance(error, McpError) and error.error.code == CONNECTION_CLOSED)
+    )
+    if not closed:
+        return
+    for db, held in list(sessions_by_db.items()):
+        if held is session:
+            del sessions_by_db[db]
+            # Let the holder task leave the transport contexts and reap the process
+            stop = _session_stops.get(db)
+            if stop is not None:
+                stop.set()
+            print(f"MCP session for {db.value} disconnected: {error!r}")
+
+
+async def get_mcp_session(db: DatabaseType = db_type) -> ClientSession:
+    """Return the long-lived MCP session for a database, starting it on first use"""
+    session = sessions_by_db.get(db)
+    if session is not None:
+        return session
+
+    async with _session_lock:
+        if db in sessions_by_db:
+            return sessions_by_db[db]
+
+        ready = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+        _session_stops[db] = stop
+        _session_tasks[db] = asyncio.create_task(_hold_mcp_session(db, ready, stop))
+        return await ready
+
+
+# OpenAI tool definitions per MCP session; the tool set is fixed for the life of
+# a server, so list_tools() only needs to run once per session, and every request
+# passes the same list object
+_tools_cache: dict[int, list[dict]] = {}
+
+
+async def get_available_tools(session: ClientSession) -> list[dict]:
+    tools = _tools_cache.get(id(session))
+    if tools is None:
+        try:
+            response = await session.list_tools()
+        except Exception as e:
+            evict_mcp_session_on_disconnect(session, e)
+            raise
+        tools = build_available_tools(response.tools)
+        _tools_cache[id(session)] = tools
+    return tools
+
+
+# Tool-call arguments larger than this are parsed in a worker thread so a big
+# payload doesn't stall other requests on the event loop
+JSON_OFFLOAD_THRESHOLD = 64 * 1024
+
+
+@lru_cache(maxsize=512)
+def _parse_cached_args(arguments: str):
+    # Argument strings like '{}' or '{"table_name": "users"}' repeat a lot
+    return json.loads(arguments)
+
+
+async def parse_tool_args(arguments: str) -> dict:
+    try:
+        if len(arguments) > JSON_OFFLOAD_THRESHOLD:
+            args = await asyncio.to_thread(json.loads, arguments)
+        else:
+            args = _parse_cached_args(arguments)
+    except json.JSONDecodeError:
+        return {}
+    # Valid JSON that isn't an object (e.g. "null") carries no arguments. Copy
+    # so callers can't mutate the cached dict
+    return dict(args) if isinstance(args, dict) else {}
+
+
+async def call_tool(session: ClientSession, name: str, arguments: str) -> str:
+    """Execute one OpenAI tool call against the MCP session and return its text"""
+    tool_args = await parse_tool_args(arguments)
+    try:
+        result = await session.call_tool(name, cast(dict, tool_args))
+    except Exception as e:
+        evict_mcp_session_on_disconnect(session, e)
+        raise
+    if result.content and len(result.content) > 0:
+        return getattr(result.content[0], "text", "")
+    return ""
+
+
+async def close_mcp_sessions():
+    for stop in list(_session_stops.values()):
+        stop.set()
+    tasks = list(_session_tasks.values())
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@app.before_serving
+async def startup():
+    global http_session, openai_client
+    http_session = create_http_session()
+    openai_client = create_openai_client(http_session)
+    await get_mcp_session()
+
+
+@app.after_serving
+async def shutdown():
+    await close_mcp_sessions()
+    await openai_client.close()
+    await http_session.close()
+
+# Maximum number of non-system messages kept per chat session; older turns are
+# evicted so the payload sent to OpenAI stays bounded for long conversations
+MAX_CHAT_TURNS = int(os.getenv("MAX_CHAT_TURNS", 63))
+
+SYSTEM_PROMPT = """You are a master database assistant with access to database tools.
 
     CRITICAL: You MUST use the available tools to interact with the database. Never make assumptions about data without querying first.
 
@@ -64,132 +272,198 @@ class ChatSession:
     Your job is to use the available database tools to answer user questions accurately. Always use tools - never provide answers without querying the database first.
     """
 
-    async def process_query(self, session: ClientSession, query: str) -> dict:
+# Shared, never-mutated system message prepended to every OpenAI request
+SYSTEM_MESSAGES = ({"role": "system", "content": SYSTEM_PROMPT},)
+
+# Returned when the model produced no answer; never cached, so a retry asks again
+FALLBACK_RESPONSE = "I apologize, but I'm having trouble generating a response. Please try rephrasing your question."
+
+# Interned message roles shared by every stored turn
+ROLE_USER = sys.intern("user")
+ROLE_ASSISTANT = sys.intern("assistant")
+ROLE_TOOL = sys.intern("tool")
+
+
+def _bounded_deque() -> deque:
+    return deque(maxlen=MAX_CHAT_TURNS)
+
+
+@dataclass
+class ChatSession:
+    # Turn history stored as parallel columns instead of one dict per message;
+    # the OpenAI message dicts are only materialized when making an API call
+    roles: deque[str] = field(default_factory=_bounded_deque)
+    contents: deque[str] = field(default_factory=_bounded_deque)
+    tool_calls: deque[list[dict] | None] = field(default_factory=_bounded_deque)
+    tool_call_ids: deque[str | None] = field(default_factory=_bounded_deque)
+    # User and assistant text messages for display, kept up to date as turns are added
+    display_messages: list[dict] = field(default_factory=list)
+    session_id: str = ""
+    # Serializes concurrent queries on the same session so their turns don't interleave
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False, compare=False)
+
+    @property
+    def messages(self) -> list[dict]:
+        """Messages payload for the OpenAI API"""
+        return self._as_openai_messages()
+
+    def _as_openai_messages(self) -> list[dict]:
+        # The system prompt is pinned outside the bounded turn history
+        messages = [*SYSTEM_MESSAGES]
+        for role, content, tool_calls, tool_call_id in zip(self.roles, self.contents, self.tool_calls, self.tool_call_ids):
+            if tool_call_id is not None:
+                messages.append(build_tool_result_msg(tool_call_id, content))
+            elif tool_calls is not None:
+                messages.append(build_tool_call_msg(content, tool_calls))
+            else:
+                messages.append({"role": role, "content": content})
+        return messages
+
+    def _append(self, role: str, content: str, tool_calls: list[dict] | None = None, tool_call_id: str | None = None):
+        self.roles.append(role)
+        self.contents.append(content)
+        self.tool_calls.append(tool_calls)
+        self.tool_call_ids.append(tool_call_id)
+        self._trim()
+        if role is not ROLE_TOOL and tool_calls is None:
+            self.display_messages.append({'role': role, 'content': content})
+
+    def _trim(self):
+        # Tool results left at the front after their assistant tool_calls message
+        # was evicted would be rejected by the API, so drop them as well
+        while self.roles and self.roles[0] is ROLE_TOOL:
+            self.roles.popleft()
+            self.contents.popleft()
+            self.tool_calls.popleft()
+            self.tool_call_ids.popleft()
+
+    def record_exchange(self, query: str, response: str) -> dict:
+        """Add a query answered without calling the model (e.g. from the response cache)"""
+        self._append(ROLE_USER, query)
+        self._append(ROLE_ASSISTANT, response)
+        return {
+            "status": "success",
+            "result": response,
+            "message_count": len(self.roles) + 1
+        }
+
+    async def _stream_turn(self, session: ClientSession, available_tools: list[dict]) -> tuple[str, list[dict], list[asyncio.Task], str | None]:
+        """Stream one assistant turn from OpenAI.
+
+        Each tool call is started on the MCP session as soon as it has been fully
+        received (the stream moved on to the next one, or ended), so tool execution
+        overlaps with the rest of the response. Returns the text content, the tool
+        calls in API message format, the tool call tasks in the same order, and the
+        turn's finish_reason.
+        """
+        stream = await openai_client.chat.completions.create(
+            model="gpt-4o",
+            max_tokens=8000,
+            messages=self.messages,
+            tools=available_tools,
+            temperature=0.1,  # Lower temperature for more consistent responses
+            stream=True,
+        )
+
+        content_parts = []
+        finish_reason = None
+        tool_calls: list[dict] = []
+        tasks: list[asyncio.Task] = []
+
+        def dispatch(count: int):
+            while len(tasks) < count:
+                function = tool_calls[len(tasks)]["function"]
+                tasks.append(asyncio.create_task(call_tool(session, function["name"], function["arguments"])))
+
         try:
-            response = await session.list_tools()
-            available_tools = [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": tool.name,
-                        "description": tool.description or "",
-                        "parameters": tool.inputSchema,
-                    }
-                }
-                for tool in response.tools
-            ]
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = choice.delta
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+
+                if delta.content:
+                    content_parts.append(delta.content)
+
+                for tool_call in delta.tool_calls or []:
+                    if tool_call.index >= len(tool_calls):
+                        # A new tool call starting means the previous ones are complete
+                        dispatch(len(tool_calls))
+                        while tool_call.index >= len(tool_calls):
+                            tool_calls.append({"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+
+                    entry = tool_calls[tool_call.index]
+                    if tool_call.id:
+                        entry["id"] = tool_call.id
+                    if tool_call.function:
+                        if tool_call.function.name:
+                            entry["function"]["name"] += tool_call.function.name
+                        if tool_call.function.arguments:
+                            entry["function"]["arguments"] += tool_call.function.arguments
+
+            dispatch(len(tool_calls))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return "".join(content_parts), tool_calls, tasks, finish_reason
 
-            if not self.messages:
-                self.messages.append({"role": "system", "content": self.system_prompt})
+    async def process_query(self, session: ClientSession, query: str) -> dict:
+        async with self.lock:
+            return await self._process_query(session, query)
+
+    async def _process_query(self, session: ClientSession, query: str) -> dict:
+        try:
+            available_tools = await get_available_tools(session)
 
             # Add user message
-            self.messages.append({"role": "user", "content": query})
+            self._append(ROLE_USER, query)
 
             max_iterations = 5  # Prevent infinite loops
-            iteration = 0
             response_text = ""
 
-            while iteration < max_iterations:
-                iteration += 1
-                
-                # Make API call to OpenAI
-                res = await openai_client.chat.completions.create(
-                    model="gpt-4o",
-                    max_tokens=8000,
-                    messages=self.messages,
-                    tools=available_tools,
-                    temperature=0.1,  # Lower temperature for more consistent responses
-                )
-
-                assistant_message = res.choices[0].message
-                
-                if assistant_message.content:
-                    response_text = assistant_message.content
-                    self.messages.append({"role": "assistant", "content": assistant_message.content})
-
-                # Handle tool calls
-                if assistant_message.tool_calls:
-                    self.messages.append({
-                        "role": "assistant", 
-                        "content": assistant_message.content or "", 
-                        "tool_calls": [
-                            {
-                                "id": tool_call.id,
-                                "type": "function",
-                                "function": {
-                                    "name": tool_call.function.name,
-                                    "arguments": tool_call.function.arguments
-                                }
-                            }
-                            for tool_call in assistant_message.tool_calls
-                        ]
-                    })
-
-                    # Execute each tool call
-                    for tool_call in assistant_message.tool_calls:
-                        tool_name = tool_call.function.name
-                        try:
-                            tool_args = json.loads(tool_call.function.arguments)
-                        except json.JSONDecodeError:
-                            tool_args = {}
-
-                        # Execute tool call
-                        result = await session.call_tool(tool_name, cast(dict, tool_args))
-                        
-                        result_content = ""
-                        if result.content and len(result.content) > 0:
-                            result_content = getattr(result.content[0], "text", "")
-
-                        # Add tool result to messages
-                        self.messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": result_content,
-                        })
-
-                    # Continue the loop to get the next response
-                    continue
-                
-                # If we got a text response and no tool calls, we're done
-                if response_text:
+            for _ in range(max_iterations):
+                # Stream the next turn from OpenAI; tool calls start executing as they arrive
+                content, tool_calls, tool_tasks, finish_reason = await self._stream_turn(session, available_tools)
+
+                if finish_reason == "length":
+                    for task in tool_tasks:
+                        task.cancel()
+                    raise RuntimeError("The model's response was cut off by the max_tokens limit")
+
+                # Without tool calls the turn is the final answer
+                if not tool_calls:
+                    if content:
+                        self._append(ROLE_ASSISTANT, content)
+                    response_text = content
                     break
-                
-                # If we got neither text nor tool calls, that's problematic
-                if not assistant_message.content and not assistant_message.tool_calls:
-                    # Add a follow-up message to prompt a response
-                    self.messages.append({
-                        "role": "user", 
-                        "content": "Please provide a response to my previous question."
-                    })
-                    continue
 
-            # If we still don't have a response after all iterations, provide a fallback
+                self._append(ROLE_ASSISTANT, content, tool_calls=tool_calls)
+
+                # The tool calls run concurrently; the MCP session matches
+                # responses to requests by id, so one session can serve them all
+                results = await asyncio.gather(*tool_tasks, return_exceptions=True)
+
+                for tool_call, result in zip(tool_calls, results):
+                    if isinstance(result, Exception):
+                        result_content = f"Error: {str(result)}"
+                    else:
+                        result_content = result
+
+                    # Add tool result to messages in the original order
+                    self._append(ROLE_TOOL, result_content, tool_call_id=tool_call["id"])
+
             if not response_text:
-                # Make one final attempt with a more explicit prompt
-                self.messages.append({
-                    "role": "user", 
-                    "content": "Please summarize what you found and provide your answer."
-                })
-                
-                res = await openai_client.chat.completions.create(
-                    model="gpt-4o",
-                    max_tokens=8000,
-                    messages=self.messages,
-                    temperature=0.3,  # Slightly higher temperature to encourage response
-                )
-                
-                final_response = res.choices[0].message.content
-                if final_response:
-                    self.messages.append({"role": "assistant", "content": final_response})
-                    response_text = final_response
-                else:
-                    response_text = "I apologize, but I'm having trouble generating a response. Please try rephrasing your question."
+                response_text = FALLBACK_RESPONSE
 
             # Return format 
             return {
                 "status": "success",
                 "result": response_text,
-                "message_count": len(self.messages)
+                "message_count": len(self.roles) + 1
             }
 
         except Exception as e:
@@ -201,139 +475,178 @@ class ChatSession:
             }
 
 
-# Store chat sessions (in production, use Redis or a database)
-chat_sessions = {}
+def fastjson(obj, status: int = 200):
+    """JSON response serialized with orjson, which is much faster than stdlib json for large payloads"""
+    return app.response_class(orjson.dumps(obj), status=status, mimetype="application/json")
+
+
+async def get_json_body():
+    """Parse the request body as JSON with orjson, returning None if it isn't valid JSON"""
+    body = await request.get_data()
+    if not body:
+        return None
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+
+
+# Store chat sessions (in production, use Redis or a database). Bounded as an
+# LRU so arbitrary session ids can't grow memory without limit
+MAX_CHAT_SESSIONS = int(os.getenv("MAX_CHAT_SESSIONS", 1024))
+chat_sessions: OrderedDict[str, ChatSession] = OrderedDict()
+
+
+def get_chat_session(session_id: str, create: bool = True) -> ChatSession | None:
+    """Look up a chat session, marking it most recently used"""
+    chat_session = chat_sessions.get(session_id)
+    if chat_session is not None:
+        chat_sessions.move_to_end(session_id)
+    elif create:
+        chat_session = chat_sessions[session_id] = ChatSession(session_id=session_id)
+        if len(chat_sessions) > MAX_CHAT_SESSIONS:
+            chat_sessions.popitem(last=False)
+    return chat_session
+
+
+# Final responses keyed by (session_id, normalized query), so repeated questions
+# in a session are answered without another OpenAI + MCP round trip
+MAX_CACHED_RESPONSES = int(os.getenv("MAX_CACHED_RESPONSES", 256))
+response_cache: OrderedDict[tuple[str, str], str] = OrderedDict()
+
+
+def _response_cache_key(session_id: str, query_text: str) -> tuple[str, str]:
+    return session_id, query_text.strip().lower()
+
+
+def clear_cached_responses(session_id: str):
+    for key in [key for key in response_cache if key[0] == session_id]:
+        del response_cache[key]
+
+
+async def answer_query(chat_session: ChatSession, query_text: str) -> dict:
+    """Answer a query from the response cache, or with the model and MCP tools"""
+    key = _response_cache_key(chat_session.session_id, query_text)
+    # Hold the session lock for cache hits too, so a cached exchange can't land
+    # between another query's tool_calls message and its tool results
+    async with chat_session.lock:
+        cached = response_cache.get(key)
+        if cached is not None:
+            response_cache.move_to_end(key)
+            return chat_session.record_exchange(query_text, cached)
+
+        session = await get_mcp_session()
+        result = await chat_session._process_query(session, query_text)
+        # Only cache real model answers, not errors or the fallback apology
+        if result["status"] == "success" and result["result"] != FALLBACK_RESPONSE:
+            response_cache[key] = result["result"]
+            if len(response_cache) > MAX_CACHED_RESPONSES:
+                response_cache.popitem(last=False)
+        return result
 
 @app.route('/')
-def index():
-    return send_from_directory('static', 'index.html')
+async def index():
+    return await send_from_directory('static', 'index.html')
 
 
 @app.route('/api/query', methods=['POST'])
-def query():
+async def query():
     """Handle query requests"""
-    data = request.get_json()
+    data = await get_json_body()
 
     if not data or 'query' not in data:
-        return jsonify({
+        return fastjson({
             "status": "error",
             "message": "No query provided"
-        }), 400
+        }, 400)
     
     query_text = data['query'].strip()
     session_id = data.get('session_id', 'default')
     
     if not query_text:
-        return jsonify({
+        return fastjson({
             "status": "error",
             "message": "Empty query"
-        }), 400
+        }, 400)
     
-    if session_id not in chat_sessions:
-        chat_sessions[session_id] = ChatSession(session_id=session_id)
-    
-    chat_session = chat_sessions[session_id]
-    
-    async def process_async():
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                return await chat_session.process_query(session, query_text)
+    chat_session = get_chat_session(session_id)
     
     try:
-        result = asyncio.run(process_async())
+        result = await answer_query(chat_session, query_text)
         print(f"Query result: {result}") 
-        return jsonify(result)
+        return fastjson(result)
     except Exception as e:
         print(f"Error processing query: {str(e)}")  
-        return jsonify({
+        return fastjson({
             "status": "error",
             "message": f"Server error: {str(e)}"
-        }), 500
+        }, 500)
 
 
 @app.route('/api/chat', methods=['POST'])
-def chat():
+async def chat():
     """Alternative endpoint with different response format"""
-    data = request.get_json()
+    data = await get_json_body()
     
     if not data or 'query' not in data:
-        return jsonify({"error": "No query provided"}), 400
+        return fastjson({"error": "No query provided"}, 400)
     
     query_text = data['query'].strip()
     session_id = data.get('session_id', 'default')
     
     if not query_text:
-        return jsonify({"error": "Empty query"}), 400
-    
-    if session_id not in chat_sessions:
-        chat_sessions[session_id] = ChatSession(session_id=session_id)
+        return fastjson({"error": "Empty query"}, 400)
     
-    chat_session = chat_sessions[session_id]
-    
-    async def process_async():
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                return await chat_session.process_query(session, query_text)
+    chat_session = get_chat_session(session_id)
     
     try:
-        result = asyncio.run(process_async())
+        result = await answer_query(chat_session, query_text)
         if result["status"] == "success":
-            return jsonify({
+            return fastjson({
                 "success": True,
                 "response": result["result"],
                 "message_count": result.get("message_count", 0)
             })
         else:
-            return jsonify({
+            return fastjson({
                 "success": False,
                 "error": result["message"],
                 "response": f"Error: {result['message']}"
             })
     except Exception as e:
-        return jsonify({
+        return fastjson({
             "success": False,
             "error": str(e),
             "response": f"Server error: {str(e)}"
-        }), 500
+        }, 500)
 
 
 @app.route('/api/clear', methods=['POST'])
-def clear_chat():
-    data = request.get_json()
+async def clear_chat():
+    data = await get_json_body()
     session_id = data.get('session_id', 'default') if data else 'default'
     
-    if session_id in chat_sessions:
+    if get_chat_session(session_id, create=False) is not None:
         chat_sessions[session_id] = ChatSession(session_id=session_id)
+    clear_cached_responses(session_id)
     
-    return jsonify({"success": True, "message": "Chat history cleared"})
+    return fastjson({"success": True, "message": "Chat history cleared"})
 
 
 @app.route('/api/history', methods=['GET'])
-def get_history():
+async def get_history():
     session_id = request.args.get('session_id', 'default')
     
-    if session_id not in chat_sessions:
-        return jsonify({"messages": []})
-    
-    chat_session = chat_sessions[session_id]
+    chat_session = get_chat_session(session_id, create=False)
+    if chat_session is None:
+        return fastjson({"messages": []})
     
-    # Filter out system messages and tool calls for display
-    display_messages = []
-    for msg in chat_session.messages:
-        if msg['role'] in ['user', 'assistant'] and 'tool_calls' not in msg:
-            display_messages.append({
-                'role': msg['role'],
-                'content': msg['content']
-            })
-    
-    return jsonify({"messages": display_messages})
+    return fastjson({"messages": chat_session.display_messages})
 
 
 @app.route('/health')
-def health_check():
-    return jsonify({"status": "healthy", "service": "Database Assistant"})
+async def health_check():
+    return fastjson({"status": "healthy", "service": "Database Assistant"})
 
 
 if __name__ == '__main__':
@@ -342,6 +655,13 @@ if __name__ == '__main__':
         print("Please set your OpenAI API key in your .env file")
         exit(1)
     
-    print("Starting Database Assistant Flask App...")
+    print("Starting Database Assistant Quart App...")
     print("Access the web interface at: http://localhost:10000")
-    app.run(debug=True, host='0.0.0.0', port=10000)
+    # Hypercorn picks uvloop with --worker-class uvloop; the development server
+    # gets it by being handed a uvloop event loop
+    try:
+        import uvloop
+        loop = uvloop.new_event_loop()
+    except ImportError:  # uvloop is not available on Windows
+        loop = None
+    app.run(debug=True, host='0.0.0.0', port=10000, loop=loop)
@@ -1,12 +1,29 @@
-import mysql.connector
+import aiomysql
+import asyncio
 import os
+import re
+import struct
+import sys
+import time
+import weakref
 
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+
+import sqlparse
+from sqlparse import tokens
+from cachetools import TTLCache
 from loguru import logger
 from dotenv import load_dotenv
+from jinja2 import Environment
 from mcp.server.fastmcp import FastMCP
+from pymysql.constants import COMMAND
 
-# Create an MCP server
-mcp = FastMCP("Demo")
+# Log from a background thread so sink I/O stays off the tool call path
+logger.remove()
+logger.add(sys.stderr, enqueue=True, level="INFO")
 
 load_dotenv()
 
@@ -14,267 +31,497 @@ load_dotenv()
 db_config = {
     'host': os.getenv("DB_HOST", "localhost"),
     'port': int(os.getenv("DB_PORT", 3306)),
-    'database': os.getenv("DB_NAME"),
+    'db': os.getenv("DB_NAME"),
     'user': os.getenv("DB_USER"),
     'password': os.getenv("DB_PASSWORD"),
     'charset': 'utf8mb4',
-    'collation': 'utf8mb4_unicode_ci'
+    'init_command': "SET NAMES utf8mb4 COLLATE utf8mb4_unicode_ci"
 }
 
-def get_database_schema() -> str:
-    """Get the database schema information"""
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))
+
+# Connection pool shared by all tools, so a tool call borrows an open connection
+# instead of paying the TCP handshake and authentication on every call. It is
+# created on the server's event loop by lifespan() below. Autocommit keeps a
+# read from leaving a transaction open, which would make the pool discard the
+# connection on release.
+pool: aiomysql.Pool | None = None
+
+# aiomysql always asks for multi-statement support at connect time, so each
+# pooled connection switches it off with COM_SET_OPTION before first use and
+# the server itself rejects stacked SQL like "SELECT 1; DROP TABLE x"
+MYSQL_OPTION_MULTI_STATEMENTS_OFF = 1
+_single_statement_conns: weakref.WeakSet = weakref.WeakSet()
+
+async def _disable_multi_statements(conn: aiomysql.Connection):
+    """Make the server reject more than one statement per query on conn"""
+    # aiomysql has no public set_option, so send the command directly
+    await conn._execute_command(COMMAND.COM_SET_OPTION, struct.pack('<H', MYSQL_OPTION_MULTI_STATEMENTS_OFF))
+    await conn._read_packet()
+
+@asynccontextmanager
+async def get_conn():
+    """Borrow a pooled connection; leaving the block returns it to the pool"""
+    async with pool.acquire() as conn:
+        if conn not in _single_statement_conns:
+            await _disable_multi_statements(conn)
+            _single_statement_conns.add(conn)
+        yield conn
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    """Open the pool, warm the schema caches and run the refresher while the server runs"""
+    global pool
+    # minsize=0 opens connections on demand, so an unreachable database makes
+    # the tools return errors instead of stopping the server from starting
+    pool = await aiomysql.create_pool(minsize=0, maxsize=POOL_SIZE, autocommit=True, **db_config)
+    # Load the schema snapshot and the context prompt up front so the first
+    # tool call isn't cold
     try:
-        conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor()
-        
-        # Get all table names
-        tables_query = """
-        SELECT TABLE_NAME 
-        FROM information_schema.TABLES 
-        WHERE TABLE_SCHEMA = %s
-        """
-        cursor.execute(tables_query, (db_config['database'],))
-        tables = cursor.fetchall()
-        
-        schema_info = f"Database Schema for '{db_config['database']}':\n\n"
-        
-        for (table_name,) in tables:
-            schema_info += f"Table: {table_name}\n"
-            
-            # Get column information for each table
-            columns_query = """
-            SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA
-            FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-            ORDER BY ORDINAL_POSITION
-            """
-            cursor.execute(columns_query, (db_config['database'], table_name))
-            columns = cursor.fetchall()
-            
-            for column in columns:
-                col_name, data_type, is_nullable, default_value, column_key, extra = column
-                pk_indicator = " (PRIMARY KEY)" if column_key == "PRI" else ""
-                null_indicator = " NOT NULL" if is_nullable == "NO" else ""
-                default_indicator = f" DEFAULT {default_value}" if default_value else ""
-                auto_inc = f" {extra}" if extra else ""
-                schema_info += f"  - {col_name}: {data_type}{pk_indicator}{null_indicator}{default_indicator}{auto_inc}\n"
-            
-            # Get sample data (first 3 rows)
-            sample_query = f"SELECT * FROM `{table_name}` LIMIT 3"
-            try:
-                cursor.execute(sample_query)
-                sample_data = cursor.fetchall()
-                if sample_data:
-                    schema_info += f"  Sample data:\n"
-                    for row in sample_data:
-                        schema_info += f"    {row}\n"
-            except Exception as e:
-                schema_info += f"  Sample data: Error reading sample data - {e}\n"
-            
-            schema_info += "\n"
-        
-        return schema_info
-        
+        await refresh_snapshot()
+        await database_context()
     except Exception as e:
-        return f"Error getting schema: {str(e)}"
+        logger.warning("Initial schema load failed: {}", e)
+    refresher = asyncio.create_task(_refresher())
+    try:
+        yield
     finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
+        refresher.cancel()
+        pool.close()
+        await pool.wait_closed()
+
+# Create an MCP server
+mcp = FastMCP("Demo", lifespan=lifespan)
+
+# Schema descriptions keyed by database name; the schema rarely changes, so
+# rebuilding it is only needed after the TTL expires or a DDL statement runs
+_schema_cache = TTLCache(maxsize=4, ttl=int(os.getenv("SCHEMA_CACHE_TTL", 300)))
+
+# The database_context prompt text, built once and kept until the schema changes
+_context_cache: str | None = None
+
+# Fixed metadata statements, kept as single module-level strings so every
+# tool sends byte-identical SQL
+TABLES_QUERY = """
+SELECT TABLE_NAME 
+FROM information_schema.TABLES 
+WHERE TABLE_SCHEMA = %s
+"""
+
+COLUMNS_QUERY = """
+SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA
+FROM information_schema.COLUMNS 
+WHERE TABLE_SCHEMA = %s
+ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+SCHEMA_REFRESH_INTERVAL = int(os.getenv("SCHEMA_REFRESH_INTERVAL", 60))
+
+# In-memory snapshot of the table list and column rows per table, serving
+# list_tables, describe_table and the schema description without a database
+# round-trip; a background task refreshes it every SCHEMA_REFRESH_INTERVAL
+# seconds and DDL through query_data marks it stale
+_snapshot = {'tables': [], 'columns': {}, 'ts': 0.0}
+_snapshot_lock = asyncio.Lock()
+
+async def refresh_snapshot():
+    """Reload the table list and column rows into the snapshot"""
+    async with get_conn() as conn, conn.cursor() as cursor:
+        await cursor.execute(TABLES_QUERY, (db_config['db'],))
+        tables = [table_name for (table_name,) in await cursor.fetchall()]
+        await cursor.execute(COLUMNS_QUERY, (db_config['db'],))
+        columns = {
+            table: [row[1:] for row in rows]
+            for table, rows in groupby(await cursor.fetchall(), key=itemgetter(0))
+        }
+    changed = (tables, columns) != (_snapshot['tables'], _snapshot['columns'])
+    _snapshot.update(tables=tables, columns=columns, ts=time.monotonic())
+    if changed:
+        _clear_schema_text()
+
+async def get_snapshot() -> tuple[list[str], dict[str, list[tuple]]]:
+    """Get the table names and column rows per table, loading them if stale"""
+    if not _snapshot['ts']:
+        # Concurrent callers wait for one reload instead of each running it
+        async with _snapshot_lock:
+            if not _snapshot['ts']:
+                await refresh_snapshot()
+    return _snapshot['tables'], _snapshot['columns']
+
+async def _valid_table(name: str) -> bool:
+    """Whether name is a table in the snapshot, and so safe to interpolate into SQL"""
+    return name in (await get_snapshot())[1]
+
+async def _refresher():
+    while True:
+        await asyncio.sleep(SCHEMA_REFRESH_INTERVAL)
+        try:
+            await refresh_snapshot()
+        except Exception as e:
+            logger.warning("Schema refresh failed: {}", e)
+
+# Formatted results of read-only queries keyed by normalized SQL; cleared
+# whenever a write or DDL statement runs through query_data
+_result_cache = TTLCache(maxsize=256, ttl=int(os.getenv("QUERY_CACHE_TTL", 60)))
+
+# query_data returns at most this many rows; larger results are truncated,
+# which also bounds the size of each cached result
+MAX_QUERY_ROWS = int(os.getenv("MAX_QUERY_ROWS", 5000))
+FETCH_BATCH_SIZE = 1000
+
+READ_PREFIXES = ('SELECT', 'SHOW', 'DESCRIBE', 'EXPLAIN')
+
+# Executable comments (/*! */) and optimizer hints (/*+ */) change what
+# the server runs, so normalize_sql keeps them as written
+KEPT_COMMENTS = ('/*!', '/*+')
+
+@lru_cache(maxsize=512)
+def normalize_sql(sql: str) -> str:
+    """Canonical form of a statement, so formatting and comment differences share a cache entry"""
+    # Only sqlparse's lexer runs: plain comments and whitespace runs become
+    # one space and every other token is kept verbatim, since identifiers
+    # can be case-sensitive and sqlparse tags some of them as keywords.
+    # Skipping statement grouping keeps this cheap and clear of sqlparse's
+    # grouping limits on very long statements.
+    parts = []
+    for ttype, value in sqlparse.lexer.tokenize(sql):
+        if (ttype in tokens.Comment and not value.startswith(KEPT_COMMENTS)) or ttype in tokens.Whitespace:
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+        else:
+            parts.append(value)
+    return "".join(parts).strip().rstrip(';').rstrip()
+
+_INSERT_RE = re.compile(r"^\s*INSERT\s+INTO\s+(.+?)\s+VALUES\s*(\(.*\))\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+
+def _is_row_list(values: str) -> bool:
+    """Whether text is only parenthesized rows separated by commas, with no trailing clause"""
+    depth = 0
+    for ttype, value in sqlparse.lexer.tokenize(values):
+        if value == '(':
+            depth += 1
+        elif value == ')':
+            depth -= 1
+            if depth < 0:
+                return False
+        elif depth == 0 and value != ',' and ttype not in tokens.Whitespace:
+            return False
+    return depth == 0
+
+def merge_inserts(sql: str) -> str | None:
+    """Fold a batch of INSERTs into one table into a single multi-row INSERT"""
+    statements = sqlparse.split(sql)
+    if len(statements) < 2:
+        return None
+    target = None
+    rows = []
+    for statement in statements:
+        match = _INSERT_RE.match(statement)
+        if not match:
+            return None
+        # A trailing clause (ON DUPLICATE KEY UPDATE, a row alias, ...) would
+        # apply to every merged row, so such batches run as sent
+        if not _is_row_list(match.group(2)):
+            return None
+        into = " ".join(match.group(1).split())
+        if target is None:
+            target = into
+        elif into != target:
+            return None
+        rows.append(match.group(2))
+    return f"INSERT INTO {target} VALUES " + ", ".join(rows)
+
+def like_pattern(keyword: str) -> str:
+    """LIKE pattern matching names that contain keyword literally"""
+    escaped = keyword.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+async def _fetch_sample(table_name: str) -> list[tuple]:
+    """Fetch the first 3 rows of a table on its own pooled connection"""
+    # Table names can't be bound, so only known names are interpolated
+    if not await _valid_table(table_name):
+        raise ValueError(f"Unknown table '{table_name}'")
+    async with get_conn() as conn, conn.cursor() as cursor:
+        await cursor.execute(f"SELECT * FROM `{table_name}` LIMIT 3")
+        return await cursor.fetchall()
+
+# Schema description layout, compiled once at import. Each table gets its
+# columns and either its first 3 rows or the error reading them.
+_jinja = Environment(trim_blocks=True, lstrip_blocks=True, autoescape=False)
+SCHEMA_TEMPLATE = _jinja.from_string("""\
+Database Schema for '{{ database }}':
+
+{% for table_name, columns, error, rows in tables %}
+Table: {{ table_name }}
+{% for col_name, data_type, is_nullable, default_value, column_key, extra in columns %}
+  - {{ col_name }}: {{ data_type }}{{ " (PRIMARY KEY)" if column_key == "PRI" }}{{ " NOT NULL" if is_nullable == "NO" }}{{ " DEFAULT " ~ default_value if default_value }}{{ " " ~ extra if extra }}
+{% endfor %}
+{% if error %}
+  Sample data: Error reading sample data - {{ error }}
+{% elif rows %}
+  Sample data:
+{% for row in rows %}
+    {{ row }}
+{% endfor %}
+{% endif %}
+
+{% endfor %}
+""")
+
+async def _fetch_samples(table_names: list[str]) -> list:
+    """Fetch sample rows for all tables concurrently, one pooled connection per table"""
+    # Leave a connection free for tool calls made while the samples are loading
+    semaphore = asyncio.Semaphore(max(1, POOL_SIZE - 1))
+
+    async def fetch(table_name: str):
+        async with semaphore:
+            return await _fetch_sample(table_name)
+
+    return await asyncio.gather(*(fetch(t) for t in table_names), return_exceptions=True)
+
+async def _build_schema() -> str:
+    """Build the database schema description from the information schema"""
+    table_names, columns_by_table = await get_snapshot()
+    samples = await _fetch_samples(table_names)
+
+    tables = []
+    for table_name, sample_data in zip(table_names, samples):
+        error = sample_data if isinstance(sample_data, Exception) else None
+        rows = None if error else sample_data
+        tables.append((table_name, columns_by_table.get(table_name, []), error, rows))
+    
+    return SCHEMA_TEMPLATE.render(database=db_config['db'], tables=tables)
+
+async def get_database_schema() -> str:
+    """Get the database schema information, cached for SCHEMA_CACHE_TTL seconds"""
+    key = db_config['db']
+    if key in _schema_cache:
+        return _schema_cache[key]
+    try:
+        schema_info = await _build_schema()
+    except Exception as e:
+        return f"Error getting schema: {str(e)}"
+    _schema_cache[key] = schema_info
+    return schema_info
+
+def _clear_schema_text():
+    """Drop the cached schema description and the prompt built from it"""
+    global _context_cache
+    _schema_cache.clear()
+    _context_cache = None
+
+def invalidate_schema_cache():
+    _clear_schema_text()
+    _snapshot['ts'] = 0.0
 
 @mcp.tool()
-def get_schema() -> str:
+async def get_schema() -> str:
     """Get the complete database schema with table structures and sample data"""
-    return get_database_schema()
+    return await get_database_schema()
+
+@mcp.tool()
+async def refresh_schema() -> str:
+    """Reload the cached table and column metadata after the schema has changed"""
+    try:
+        await refresh_snapshot()
+        _clear_schema_text()
+        return f"Schema refreshed: {len(_snapshot['tables'])} tables."
+    except Exception as e:
+        return f"Error: {str(e)}"
 
 @mcp.tool()
-def list_tables() -> str:
+async def list_tables() -> str:
     """List all tables in the database"""
     try:
-        conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor()
-        
-        tables_query = """
-        SELECT TABLE_NAME 
-        FROM information_schema.TABLES 
-        WHERE TABLE_SCHEMA = %s
-        """
-        cursor.execute(tables_query, (db_config['database'],))
-        tables = cursor.fetchall()
-        
-        table_list = "Available tables:\n"
-        for (table_name,) in tables:
-            table_list += f"- {table_name}\n"
-        return table_list
+        table_names, _ = await get_snapshot()
+        parts = ["Available tables:\n"]
+        parts.extend(f"- {table_name}\n" for table_name in table_names)
+        return "".join(parts)
     except Exception as e:
         return f"Error: {str(e)}"
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 @mcp.tool()
-def describe_table(table_name: str) -> str:
+async def describe_table(table_name: str) -> str:
     """Get detailed information about a specific table including columns and sample data"""
     try:
-        conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor()
-        
-        # Check if table exists
-        check_query = """
-        SELECT TABLE_NAME 
-        FROM information_schema.TABLES 
-        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-        """
-        cursor.execute(check_query, (db_config['database'], table_name))
-        exists = cursor.fetchone()
-        
-        if not exists:
+        # Existence check and column information come from the cached metadata;
+        # only names found there are interpolated into the queries below
+        if not await _valid_table(table_name):
             return f"Table '{table_name}' does not exist."
+        columns = (await get_snapshot())[1][table_name]
+    
+        async with get_conn() as conn, conn.cursor() as cursor:
+            parts = [f"Table: {table_name}\n\nColumns:\n"]
+            column_names = []
+            for column in columns:
+                col_name, data_type, is_nullable, default_value, column_key, extra = column
+                column_names.append(col_name)
+                pk_indicator = " (PRIMARY KEY)" if column_key == "PRI" else ""
+                null_indicator = " NOT NULL" if is_nullable == "NO" else ""
+                default_indicator = f" DEFAULT {default_value}" if default_value else ""
+                auto_inc = f" {extra}" if extra else ""
+                parts.append(f"  - {col_name}: {data_type}{pk_indicator}{null_indicator}{default_indicator}{auto_inc}\n")
         
-        # Get column information
-        columns_query = """
-        SELECT COLUMN_NAME, DATA_TYPE, IS_NULLABLE, COLUMN_DEFAULT, COLUMN_KEY, EXTRA
-        FROM information_schema.COLUMNS 
-        WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
-        ORDER BY ORDINAL_POSITION
-        """
-        cursor.execute(columns_query, (db_config['database'], table_name))
-        columns = cursor.fetchall()
-        
-        table_info = f"Table: {table_name}\n\nColumns:\n"
-        column_names = []
-        for column in columns:
-            col_name, data_type, is_nullable, default_value, column_key, extra = column
-            column_names.append(col_name)
-            pk_indicator = " (PRIMARY KEY)" if column_key == "PRI" else ""
-            null_indicator = " NOT NULL" if is_nullable == "NO" else ""
-            default_indicator = f" DEFAULT {default_value}" if default_value else ""
-            auto_inc = f" {extra}" if extra else ""
-            table_info += f"  - {col_name}: {data_type}{pk_indicator}{null_indicator}{default_indicator}{auto_inc}\n"
-        
-        # Get row count
-        count_query = f"SELECT COUNT(*) FROM `{table_name}`"
-        cursor.execute(count_query)
-        row_count = cursor.fetchone()[0]
-        table_info += f"\nTotal rows: {row_count}\n"
+            # Get the row count and sample data in one round-trip; the count row is
+            # joined to each sample row, or to a single row of NULLs when empty.
+            sample_query = f"""
+            SELECT c.cnt, s.*
+            FROM (SELECT COUNT(*) AS cnt FROM `{table_name}`) c
+            LEFT JOIN (SELECT * FROM `{table_name}` LIMIT 5) s ON TRUE
+            """
+            await cursor.execute(sample_query)
+            rows = await cursor.fetchall()
+            row_count = rows[0][0]
+            sample_data = [row[1:] for row in rows] if row_count else []
+            parts.append(f"\nTotal rows: {row_count}\n")
         
-        # Get sample data
-        sample_query = f"SELECT * FROM `{table_name}` LIMIT 5"
-        cursor.execute(sample_query)
-        sample_data = cursor.fetchall()
-        if sample_data:
-            table_info += f"\nSample data (first 5 rows):\n"
-            table_info += f"  {' | '.join(column_names)}\n"
-            table_info += f"  {'-' * (len(' | '.join(column_names)))}\n"
-            for row in sample_data:
-                table_info += f"  {' | '.join(str(val) for val in row)}\n"
+            if sample_data:
+                header = ' | '.join(column_names)
+                parts.append(f"\nSample data (first 5 rows):\n")
+                parts.append(f"  {header}\n")
+                parts.append(f"  {'-' * len(header)}\n")
+                parts.extend(f"  {' | '.join(map(str, row))}\n" for row in sample_data)
         
-        return table_info
+            return "".join(parts)
         
     except Exception as e:
         return f"Error: {str(e)}"
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 @mcp.tool()
-def query_data(sql: str) -> str:
+async def query_data(sql: str) -> str:
     """Execute SQL queries safely. Use get_schema() first to understand the database structure."""
-    logger.info(f"Executing SQL query: {sql}")
+    logger.opt(lazy=True).info("Executing SQL query: {}", lambda: sql)
+    is_read = sql.strip().upper().startswith(READ_PREFIXES)
     try:
-        conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor()
+        # The server rejects stacked SQL (see get_conn); splitting here only
+        # gives a clearer error. A batch of INSERTs into one table is the
+        # exception: it is sent as a single statement, one round-trip
+        # instead of one per row.
+        statement = merge_inserts(sql)
+        if statement is None:
+            if len(sqlparse.split(sql)) > 1:
+                return "Error: query_data runs one statement at a time; send each statement separately."
+            statement = sql
         
-        cursor.execute(sql)
+        if is_read:
+            key = (normalize_sql(sql), db_config['db'])
+            if key in _result_cache:
+                return _result_cache[key]
         
-        # Handle different types of queries
-        if sql.strip().upper().startswith(('SELECT', 'SHOW', 'DESCRIBE', 'EXPLAIN')):
-            result = cursor.fetchall()
-            if not result:
-                return "Query executed successfully but returned no results."
+        # Reads stream through an unbuffered cursor, so rows are only pulled off
+        # the socket as they are fetched
+        cursor_class = aiomysql.SSCursor if is_read else aiomysql.Cursor
+        truncated = False
+        async with get_conn() as conn:
+            cursor = await conn.cursor(cursor_class)
+            try:
+                await cursor.execute(statement)
             
-            # Format results nicely
-            output = f"Query returned {len(result)} row(s):\n\n"
-            for i, row in enumerate(result, 1):
-                output += f"Row {i}: {row}\n"
-        else:
-            # For INSERT, UPDATE, DELETE, etc.
-            conn.commit()
-            output = f"Query executed successfully. Affected rows: {cursor.rowcount}"
+                # Handle different types of queries
+                if is_read:
+                    # Fetch in batches and stop one row past the cap, so a huge
+                    # result is never materialized just to be truncated
+                    result = []
+                    while len(result) <= MAX_QUERY_ROWS:
+                        batch = await cursor.fetchmany(FETCH_BATCH_SIZE)
+                        if not batch:
+                            break
+                        result.extend(batch)
+                    if not result:
+                        return "Query executed successfully but returned no results."
+            
+                    truncated = len(result) > MAX_QUERY_ROWS
+                    del result[MAX_QUERY_ROWS:]
+            
+                    # Format results nicely
+                    if truncated:
+                        header = f"Query returned more than {MAX_QUERY_ROWS} rows, showing the first {MAX_QUERY_ROWS}:\n\n"
+                    else:
+                        header = f"Query returned {len(result)} row(s):\n\n"
+                    output = header + "".join(f"Row {i}: {row}\n" for i, row in enumerate(result, 1))
+                    if truncated:
+                        output += f"... (truncated after {MAX_QUERY_ROWS} rows)\n"
+                    _result_cache[key] = output
+                else:
+                    # For INSERT, UPDATE, DELETE, etc. (committed by autocommit)
+                    _result_cache.clear()
+                    # The leading keyword can hide behind comments or parentheses,
+                    # so any write marks the cached schema stale rather than
+                    # guessing which statements are DDL
+                    invalidate_schema_cache()
+                    output = f"Query executed successfully. Affected rows: {cursor.rowcount}"
         
-        return output
+                return output
+            finally:
+                if truncated:
+                    # Closing an unbuffered cursor reads every remaining row off
+                    # the socket; dropping the connection instead stops the
+                    # transfer, and the pool discards closed connections
+                    conn.close()
+                else:
+                    await cursor.close()
     except Exception as e:
         return f"Error: {str(e)}"
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 @mcp.tool()
-def search_tables(keyword: str) -> str:
+async def search_tables(keyword: str) -> str:
     """Search for tables or columns containing a specific keyword"""
     try:
-        conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor()
-        
-        # Get all tables
-        tables_query = """
-        SELECT TABLE_NAME 
-        FROM information_schema.TABLES 
-        WHERE TABLE_SCHEMA = %s
-        """
-        cursor.execute(tables_query, (db_config['database'],))
-        tables = cursor.fetchall()
-        
-        matches = []
-        
-        for (table_name,) in tables:
-            # Check if table name contains keyword
-            if keyword.lower() in table_name.lower():
-                matches.append(f"Table: {table_name}")
-            
-            # Check columns
-            columns_query = """
-            SELECT COLUMN_NAME 
+        async with get_conn() as conn, conn.cursor() as cursor:
+            # Match table and column names in one round-trip; the table's own
+            # row (ordinal 0) sorts ahead of its matching columns. Names are
+            # lowered because information_schema compares table names
+            # case-sensitively on case-sensitive filesystems.
+            search_query = """
+            SELECT TABLE_NAME, NULL, 0
+            FROM information_schema.TABLES 
+            WHERE TABLE_SCHEMA = %s AND LOWER(TABLE_NAME) LIKE %s
+            UNION ALL
+            SELECT TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION
             FROM information_schema.COLUMNS 
-            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+            WHERE TABLE_SCHEMA = %s AND LOWER(COLUMN_NAME) LIKE %s
+            ORDER BY 1, 3
             """
-            cursor.execute(columns_query, (db_config['database'], table_name))
-            columns = cursor.fetchall()
-            
-            matching_columns = []
-            for (column_name,) in columns:
-                if keyword.lower() in column_name.lower():
-                    matching_columns.append(column_name)
+            pattern = like_pattern(keyword.lower())
+            await cursor.execute(search_query, (db_config['db'], pattern, db_config['db'], pattern))
+        
+            matches = []
+        
+            for table_name, rows in groupby(await cursor.fetchall(), key=itemgetter(0)):
+                rows = list(rows)
+                if rows[0][1] is None:
+                    matches.append(f"Table: {table_name}")
+                    rows = rows[1:]
             
-            if matching_columns:
-                matches.append(f"Table '{table_name}' has columns: {', '.join(matching_columns)}")
+                matching_columns = [column_name for _, column_name, _ in rows]
+                if matching_columns:
+                    matches.append(f"Table '{table_name}' has columns: {', '.join(matching_columns)}")
         
-        if matches:
-            return f"Found matches for '{keyword}':\n" + "\n".join(matches)
-        else:
-            return f"No tables or columns found containing '{keyword}'"
+            if matches:
+                return f"Found matches for '{keyword}':\n" + "\n".join(matches)
+            else:
+                return f"No tables or columns found containing '{keyword}'"
             
     except Exception as e:
         return f"Error: {str(e)}"
-    finally:
-        if 'cursor' in locals():
-            cursor.close()
-        if 'conn' in locals():
-            conn.close()
 
 @mcp.prompt()
-def database_context() -> str:
+async def database_context() -> str:
     """Provides context about the database schema for the AI assistant"""
+    global _context_cache
+    if _context_cache is None:
+        context = await _build_context()
+        # Only memoize a successfully built schema, not an error message
+        if _schema_cache:
+            _context_cache = context
+        return context
+    return _context_cache
+
+async def _build_context() -> str:
+    schema_info = await get_database_schema()
     return f"""Database Context:
 
-{get_database_schema()}
+{schema_info}
 
 Instructions for querying:
 1. Always use get_schema() or list_tables() first to understand the database structure
@@ -290,6 +537,7 @@ Available tools:
 - describe_table(table_name): Get detailed table information
 - search_tables(keyword): Search for tables/columns by keyword
 - query_data(sql): Execute SQL queries
+- refresh_schema(): Reload table metadata after schema changes
 """
 
 @mcp.prompt()
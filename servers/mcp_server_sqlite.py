@@ -1,5 +1,10 @@
+import atexit
 import sqlite3
 import os
+import sys
+import threading
+from itertools import islice
+from pathlib import Path
 
 from loguru import logger
 from dotenv import load_dotenv
@@ -12,49 +17,242 @@ load_dotenv()
 
 db_path = os.getenv("DB_PATH")
 
-def get_database_schema() -> str:
-    """Get the database schema information"""
-    conn = sqlite3.connect(db_path)
-    try:
-        # Get all table names
-        tables_query = "SELECT name FROM sqlite_master WHERE type='table';"
-        tables = conn.execute(tables_query).fetchall()
-        
-        schema_info = "Database Schema:\n\n"
-        
-        for (table_name,) in tables:
-            schema_info += f"Table: {table_name}\n"
-            
-            # Get column information for each table
-            pragma_query = f"PRAGMA table_info({table_name});"
-            columns = conn.execute(pragma_query).fetchall()
-            
-            for column in columns:
-                cid, name, data_type, notnull, default_value, pk = column
-                pk_indicator = " (PRIMARY KEY)" if pk else ""
-                null_indicator = " NOT NULL" if notnull else ""
-                default_indicator = f" DEFAULT {default_value}" if default_value else ""
-                schema_info += f"  - {name}: {data_type}{pk_indicator}{null_indicator}{default_indicator}\n"
+# Per-connection tuning
+CONNECTION_PRAGMAS = (
+    "cache_size=-65536",
+    "mmap_size=268435456",
+    "temp_store=MEMORY",
+    "busy_timeout=30000",
+)
+
+# WAL lets the read-only connection below keep reading while query_data
+# writes, but the journal mode is stored in the database file itself, so it
+# is only switched on when SQLITE_WAL opts in
+SQLITE_WAL = os.getenv("SQLITE_WAL", "").lower() in ("1", "true", "yes")
+JOURNAL_PRAGMAS = ("journal_mode=WAL",) if SQLITE_WAL else ()
+
+# One connection shared by all tools keeps SQLite's parsed schema and page
+# cache warm between calls; FastMCP may run tools concurrently, so every use
+# goes through _CONN_LOCK
+_CONN = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+for pragma in (*JOURNAL_PRAGMAS, "synchronous=NORMAL", *CONNECTION_PRAGMAS):
+    _CONN.execute(f"PRAGMA {pragma}")
+_CONN_LOCK = threading.Lock()
+
+@atexit.register
+def _close_connection():
+    # Let the query planner refresh statistics on the tables it has used
+    # (near-free when nothing changed) before the connection goes away
+    with _CONN_LOCK:
+        _CONN.execute("PRAGMA optimize")
+        _CONN.close()
+
+# The introspection tools never write, so they share a separate read-only
+# connection and don't wait behind query_data
+_RO_CONN = sqlite3.connect(
+    f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+)
+for pragma in CONNECTION_PRAGMAS:
+    _RO_CONN.execute(f"PRAGMA {pragma}")
+_RO_CONN_LOCK = threading.Lock()
+atexit.register(_RO_CONN.close)
+
+# Introspection results, filled lazily on first access and kept until
+# a statement run by query_data changes the schema; sample rows and the
+# schema text that shows them are also dropped when a statement changes
+# any rows
+_schema_cache = {
+    "tables": None, "table_set": None, "columns": {}, "samples": {},
+    "schema_text": None, "skeleton_text": None,
+}
+_SCHEMA_LOCK = threading.Lock()
+
+# Rendered database_context prompt, dropped when the schema changes (it
+# carries no sample rows)
+_context_cache: str | None = None
+
+# SQLite bumps the schema version on every schema change, however the
+# statement is written (leading comments, CTEs, ...)
+SCHEMA_VERSION_QUERY = "PRAGMA schema_version;"
+
+# query_data returns at most this many rows; larger results are truncated
+MAX_QUERY_ROWS = int(os.getenv("MAX_QUERY_ROWS", 5000))
+
+# Introspection SQL is kept constant (table names are bound, not formatted in)
+# so every call hits sqlite3's per-connection statement cache
+TABLES_QUERY = "SELECT name FROM sqlite_master WHERE type='table';"
+
+TABLE_COLUMNS_QUERY = """
+    SELECT cid, name, type, "notnull", dflt_value, pk FROM pragma_table_info(?)
+"""
+
+COLUMNS_QUERY = """
+    SELECT m.name, p.cid, p.name, p.type, p."notnull", p.dflt_value, p.pk
+    FROM sqlite_master m JOIN pragma_table_info(m.name) p
+    WHERE m.type = 'table'
+    ORDER BY m.rowid, p.cid
+"""
+
+# LIKE is case-insensitive for ASCII, so names are matched without lower()
+SEARCH_QUERY = """
+    SELECT m.name, m.name LIKE :kw ESCAPE '\\', p.name, p.name LIKE :kw ESCAPE '\\'
+    FROM sqlite_master m JOIN pragma_table_info(m.name) p
+    WHERE m.type = 'table'
+      AND (m.name LIKE :kw ESCAPE '\\' OR p.name LIKE :kw ESCAPE '\\')
+"""
+
+def _quote_identifier(name: str) -> str:
+    """Quote a table name for the few statements that can't bind it"""
+    return '"' + name.replace('"', '""') + '"'
+
+# Table, column and type names are interned as they enter the cache, so the
+# names repeated across tables share one string and set/dict lookups
+# short-circuit on identity
+def _intern_column(cid, name, data_type, notnull, default_value, pk) -> tuple:
+    return (cid, sys.intern(name), sys.intern(data_type), notnull, default_value, pk)
+
+def _get_tables(conn) -> list[str]:
+    """Get the names of all tables, cached"""
+    with _SCHEMA_LOCK:
+        tables = _schema_cache["tables"]
+    if tables is None:
+        tables = [sys.intern(name) for (name,) in conn.execute(TABLES_QUERY)]
+        with _SCHEMA_LOCK:
+            _schema_cache["tables"] = tables
+    return tables
+
+def _get_table_set(conn) -> frozenset[str]:
+    """Get the names of all tables as a set for membership checks, cached"""
+    with _SCHEMA_LOCK:
+        table_set = _schema_cache["table_set"]
+    if table_set is None:
+        table_set = frozenset(_get_tables(conn))
+        with _SCHEMA_LOCK:
+            _schema_cache["table_set"] = table_set
+    return table_set
+
+def _get_columns(conn, table_name: str) -> list[tuple]:
+    """Get the PRAGMA table_info rows of a table, cached"""
+    with _SCHEMA_LOCK:
+        columns = _schema_cache["columns"].get(table_name)
+    if columns is None:
+        columns = [_intern_column(*row) for row in conn.execute(TABLE_COLUMNS_QUERY, (table_name,))]
+        with _SCHEMA_LOCK:
+            _schema_cache["columns"][table_name] = columns
+    return columns
+
+def _get_all_columns(conn) -> dict[str, list[tuple]]:
+    """Get the PRAGMA table_info rows of every table, cached, in one query"""
+    with _SCHEMA_LOCK:
+        tables = _schema_cache["tables"]
+        cached = _schema_cache["columns"]
+        if tables is not None and all(t in cached for t in tables):
+            return {t: cached[t] for t in tables}
+    columns = {}
+    for table_name, *column in conn.execute(COLUMNS_QUERY):
+        columns.setdefault(sys.intern(table_name), []).append(_intern_column(*column))
+    with _SCHEMA_LOCK:
+        _schema_cache["tables"] = list(columns)
+        _schema_cache["table_set"] = None
+        _schema_cache["columns"].update(columns)
+    return columns
+
+def _get_sample(conn, table_name: str) -> list[tuple]:
+    """Get the first 3 rows of a table, cached (conn may also be a cursor)"""
+    with _SCHEMA_LOCK:
+        sample_data = _schema_cache["samples"].get(table_name)
+    if sample_data is None:
+        sample_query = f"SELECT * FROM {_quote_identifier(table_name)} LIMIT 3;"
+        sample_data = conn.execute(sample_query).fetchall()
+        with _SCHEMA_LOCK:
+            _schema_cache["samples"][table_name] = sample_data
+    return sample_data
+
+def _invalidate_samples():
+    with _SCHEMA_LOCK:
+        _schema_cache["samples"].clear()
+        _schema_cache["schema_text"] = None
+
+def _invalidate_schema_cache():
+    global _context_cache
+    with _SCHEMA_LOCK:
+        _schema_cache["tables"] = None
+        _schema_cache["table_set"] = None
+        _schema_cache["columns"].clear()
+        _schema_cache["samples"].clear()
+        _schema_cache["schema_text"] = None
+        _schema_cache["skeleton_text"] = None
+        _context_cache = None
+
+# Warm up at import so the first tool call doesn't pay for opening the file and
+# parsing the schema; if the database isn't usable yet the caches simply fill
+# on first use
+try:
+    with _RO_CONN_LOCK:
+        _get_all_columns(_RO_CONN)
+except sqlite3.Error as e:
+    logger.warning(f"Could not prefetch the schema, loading it on first use: {e}")
+
+# Column indicators for each (notnull, pk) combination
+_SUFFIXES = {
+    (notnull, pk): (" (PRIMARY KEY)" if pk else "") + (" NOT NULL" if notnull else "")
+    for notnull in (False, True)
+    for pk in (False, True)
+}
+
+def _format_column(column: tuple) -> str:
+    """Format one PRAGMA table_info row as a schema line"""
+    cid, name, data_type, notnull, default_value, pk = column
+    default_indicator = f" DEFAULT {default_value}" if default_value else ""
+    return f"  - {name}: {data_type}{_SUFFIXES[bool(notnull), bool(pk)]}{default_indicator}\n"
+
+def get_database_schema(include_samples: bool = True) -> str:
+    """Get the database schema information, with each table's first rows unless include_samples is False"""
+    # The skeleton (columns only) is kept until the schema changes, the full
+    # text until the schema or the sample rows change
+    text_key = "schema_text" if include_samples else "skeleton_text"
+    with _RO_CONN_LOCK:
+        try:
+            with _SCHEMA_LOCK:
+                schema_text = _schema_cache[text_key]
+            if schema_text is not None:
+                return schema_text
             
-            # Get sample data (first 3 rows)
-            sample_query = f"SELECT * FROM {table_name} LIMIT 3;"
+            parts = ["Database Schema:\n\n"]
+            complete = True
+            # Samples for every table are read through one cursor rather than
+            # a fresh cursor per table
+            cursor = _RO_CONN.cursor()
             try:
-                sample_data = conn.execute(sample_query).fetchall()
-                if sample_data:
-                    schema_info += f"  Sample data:\n"
-                    for row in sample_data:
-                        schema_info += f"    {row}\n"
-            except Exception as e:
-                schema_info += f"  Sample data: Error reading sample data - {e}\n"
+                # Column information for every table comes from one query
+                for table_name, columns in _get_all_columns(_RO_CONN).items():
+                    parts.append(f"Table: {table_name}\n")
+                    parts.extend(map(_format_column, columns))
+                
+                    # Get sample data (first 3 rows)
+                    if include_samples:
+                        try:
+                            sample_data = _get_sample(cursor, table_name)
+                            if sample_data:
+                                parts.append(f"  Sample data:\n")
+                                parts.extend(f"    {row}\n" for row in sample_data)
+                        except Exception as e:
+                            parts.append(f"  Sample data: Error reading sample data - {e}\n")
+                            complete = False
+                
+                    parts.append("\n")
+            finally:
+                cursor.close()
             
-            schema_info += "\n"
+            schema_text = "".join(parts)
+            # A failed sample read isn't memoized, so the next call retries it
+            if complete:
+                with _SCHEMA_LOCK:
+                    _schema_cache[text_key] = schema_text
+            return schema_text
         
-        return schema_info
-        
-    except Exception as e:
-        return f"Error getting schema: {str(e)}"
-    finally:
-        conn.close()
+        except Exception as e:
+            return f"Error getting schema: {str(e)}"
 
 @mcp.tool()
 def get_schema() -> str:
@@ -64,135 +262,126 @@ def get_schema() -> str:
 @mcp.tool()
 def list_tables() -> str:
     """List all tables in the database"""
-    conn = sqlite3.connect(db_path)
-    try:
-        tables_query = "SELECT name FROM sqlite_master WHERE type='table';"
-        tables = conn.execute(tables_query).fetchall()
-        table_list = "Available tables:\n"
-        for (table_name,) in tables:
-            table_list += f"- {table_name}\n"
-        return table_list
-    except Exception as e:
-        return f"Error: {str(e)}"
-    finally:
-        conn.close()
+    with _RO_CONN_LOCK:
+        try:
+            parts = ["Available tables:\n"]
+            parts.extend(f"- {table_name}\n" for table_name in _get_tables(_RO_CONN))
+            return "".join(parts)
+        except Exception as e:
+            return f"Error: {str(e)}"
 
 @mcp.tool()
 def describe_table(table_name: str) -> str:
     """Get detailed information about a specific table including columns and sample data"""
-    conn = sqlite3.connect(db_path)
-    try:
-        # Check if table exists
-        check_query = "SELECT name FROM sqlite_master WHERE type='table' AND name=?;"
-        exists = conn.execute(check_query, (table_name,)).fetchone()
-        
-        if not exists:
-            return f"Table '{table_name}' does not exist."
+    with _RO_CONN_LOCK:
+        try:
+            # Check if table exists
+            if table_name not in _get_table_set(_RO_CONN):
+                return f"Table '{table_name}' does not exist."
         
-        # Get column information
-        pragma_query = f"PRAGMA table_info({table_name});"
-        columns = conn.execute(pragma_query).fetchall()
+            # Get column information
+            columns = _get_columns(_RO_CONN, table_name)
         
-        table_info = f"Table: {table_name}\n\nColumns:\n"
-        for column in columns:
-            cid, name, data_type, notnull, default_value, pk = column
-            pk_indicator = " (PRIMARY KEY)" if pk else ""
-            null_indicator = " NOT NULL" if notnull else ""
-            default_indicator = f" DEFAULT {default_value}" if default_value else ""
-            table_info += f"  - {name}: {data_type}{pk_indicator}{null_indicator}{default_indicator}\n"
+            parts = [f"Table: {table_name}\n\nColumns:\n"]
+            parts.extend(map(_format_column, columns))
         
-        # Get row count
-        count_query = f"SELECT COUNT(*) FROM {table_name};"
-        row_count = conn.execute(count_query).fetchone()[0]
-        table_info += f"\nTotal rows: {row_count}\n"
+            # Get row count (table_name was checked against the table list above,
+            # so quoting it is safe)
+            count_query = f"SELECT COUNT(*) FROM {_quote_identifier(table_name)};"
+            row_count = _RO_CONN.execute(count_query).fetchone()[0]
+            parts.append(f"\nTotal rows: {row_count}\n")
         
-        # Get sample data
-        sample_query = f"SELECT * FROM {table_name} LIMIT 5;"
-        sample_data = conn.execute(sample_query).fetchall()
-        if sample_data:
-            table_info += f"\nSample data (first 5 rows):\n"
-            # Get column names for header
-            column_names = [col[1] for col in columns]
-            table_info += f"  {' | '.join(column_names)}\n"
-            table_info += f"  {'-' * (len(' | '.join(column_names)))}\n"
-            for row in sample_data:
-                table_info += f"  {' | '.join(str(val) for val in row)}\n"
+            # Get sample data
+            sample_query = f"SELECT * FROM {_quote_identifier(table_name)} LIMIT 5;"
+            sample_data = _RO_CONN.execute(sample_query).fetchall()
+            if sample_data:
+                parts.append(f"\nSample data (first 5 rows):\n")
+                # Get column names for header
+                header = " | ".join(col[1] for col in columns)
+                parts.append(f"  {header}\n  {'-' * len(header)}\n")
+                parts.extend(f"  {' | '.join(map(str, row))}\n" for row in sample_data)
         
-        return table_info
+            return "".join(parts)
         
-    except Exception as e:
-        return f"Error: {str(e)}"
-    finally:
-        conn.close()
+        except Exception as e:
+            return f"Error: {str(e)}"
 
 @mcp.tool()
 def query_data(sql: str) -> str:
     """Execute SQL queries safely. Use get_schema() first to understand the database structure."""
     logger.info(f"Executing SQL query: {sql}")
-    conn = sqlite3.connect(db_path)
-    try:
-        result = conn.execute(sql).fetchall()
-        conn.commit()
+    with _CONN_LOCK:
+        try:
+            changes_before = _CONN.total_changes
+            (schema_before,) = _CONN.execute(SCHEMA_VERSION_QUERY).fetchone()
+            cursor = _CONN.execute(sql)
+            try:
+                # Rows are formatted as they stream off the cursor, reading one
+                # past the cap to detect truncation, so a huge result is never
+                # materialized
+                rows = [f"Row {i}: {row}\n" for i, row in enumerate(islice(cursor, MAX_QUERY_ROWS + 1), 1)]
+            finally:
+                cursor.close()
+            # The connection autocommits, so only a transaction the statement
+            # itself opened (an explicit BEGIN) is left to commit
+            if _CONN.in_transaction:
+                _CONN.commit()
+        
+            if _CONN.execute(SCHEMA_VERSION_QUERY).fetchone()[0] != schema_before:
+                _invalidate_schema_cache()
+            elif _CONN.total_changes != changes_before:
+                _invalidate_samples()
         
-        if not result:
-            return "Query executed successfully but returned no results."
+            if not rows:
+                return "Query executed successfully but returned no results."
         
-        # Format results nicely
-        output = f"Query returned {len(result)} row(s):\n\n"
-        for i, row in enumerate(result, 1):
-            output += f"Row {i}: {row}\n"
+            # Format results nicely
+            truncated = len(rows) > MAX_QUERY_ROWS
+            del rows[MAX_QUERY_ROWS:]
+            if truncated:
+                header = f"Query returned more than {MAX_QUERY_ROWS} rows, showing the first {MAX_QUERY_ROWS}:\n\n"
+                rows.append(f"... (truncated after {MAX_QUERY_ROWS} rows)\n")
+            else:
+                header = f"Query returned {len(rows)} row(s):\n\n"
         
-        return output
-    except Exception as e:
-        return f"Error: {str(e)}"
-    finally:
-        conn.close()
+            return header + "".join(rows)
+        except Exception as e:
+            return f"Error: {str(e)}"
 
 @mcp.tool()
 def search_tables(keyword: str) -> str:
     """Search for tables or columns containing a specific keyword"""
-    conn = sqlite3.connect(db_path)
-    try:
-        # Get all tables
-        tables_query = "SELECT name FROM sqlite_master WHERE type='table';"
-        tables = conn.execute(tables_query).fetchall()
-        
-        matches = []
-        
-        for (table_name,) in tables:
-            # Check if table name contains keyword
-            if keyword.lower() in table_name.lower():
-                matches.append(f"Table: {table_name}")
-            
-            # Check columns
-            pragma_query = f"PRAGMA table_info({table_name});"
-            columns = conn.execute(pragma_query).fetchall()
-            
-            matching_columns = []
-            for column in columns:
-                column_name = column[1]
-                if keyword.lower() in column_name.lower():
+    # Escape LIKE wildcards so the keyword is matched literally
+    pattern = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    with _RO_CONN_LOCK:
+        try:
+            # Group the matching columns by table, keeping sqlite_master order
+            tables = {}
+            rows = _RO_CONN.execute(SEARCH_QUERY, {"kw": f"%{pattern}%"})
+            for table_name, table_matches, column_name, column_matches in rows:
+                _, matching_columns = tables.setdefault(table_name, (table_matches, []))
+                if column_matches:
                     matching_columns.append(column_name)
             
-            if matching_columns:
-                matches.append(f"Table '{table_name}' has columns: {', '.join(matching_columns)}")
-        
-        if matches:
-            return f"Found matches for '{keyword}':\n" + "\n".join(matches)
-        else:
-            return f"No tables or columns found containing '{keyword}'"
+            matches = []
+            for table_name, (table_matches, matching_columns) in tables.items():
+                if table_matches:
+                    matches.append(f"Table: {table_name}")
+                
+                if matching_columns:
+                    matches.append(f"Table '{table_name}' has columns: {', '.join(matching_columns)}")
+            
+            if matches:
+                return f"Found matches for '{keyword}':\n" + "\n".join(matches)
+            else:
+                return f"No tables or columns found containing '{keyword}'"
             
-    except Exception as e:
-        return f"Error: {str(e)}"
-    finally:
-        conn.close()
+        except Exception as e:
+            return f"Error: {str(e)}"
 
-@mcp.prompt()
-def database_context() -> str:
-    """Provides context about the database schema for the AI assistant"""
-    return f"""Database Context:
+_CONTEXT_TEMPLATE = """Database Context:
 
-{get_database_schema()}
+{schema_info}
 
 Instructions for querying:
 1. Always use get_schema() or list_tables() first to understand the database structure
@@ -209,6 +398,22 @@ Available tools:
 - query_data(sql): Execute SQL queries
 """
 
+@mcp.prompt()
+def database_context() -> str:
+    """Provides context about the database schema for the AI assistant"""
+    global _context_cache
+    if _context_cache is None:
+        # The prompt only lists tables and columns; sample rows are read when
+        # get_schema() is called
+        context = _CONTEXT_TEMPLATE.format(schema_info=get_database_schema(include_samples=False))
+        with _SCHEMA_LOCK:
+            # Only memoize a successfully built schema, not an error message,
+            # and not one invalidated while it was being built
+            if _schema_cache["tables"] is not None:
+                _context_cache = context
+        return context
+    return _context_cache
+
 @mcp.prompt()
 def example_prompt(code: str) -> str:
     return f"Please review this code:\n\n{code}"